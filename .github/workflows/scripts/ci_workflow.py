@@ -4,76 +4,185 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import functools
 import json
+import mmap
 import os
 import re
-import shutil
 import subprocess
 import sys
-import textwrap
 import time
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
+from itertools import product
 from pathlib import Path
 from typing import Any
 
-try:
-    import requests  # type: ignore[import-untyped]
-except ModuleNotFoundError:  # pragma: no cover - fallback when requests unavailable
-    requests = None
-    from urllib.parse import urlencode
-    from urllib.request import Request, urlopen
-
-    class _HTTPResponse:
-        """Minimal response wrapper mirroring requests.Response."""
-
-        def __init__(self, status_code: int, payload: dict[str, Any]) -> None:
-            self.status_code = status_code
-            self._payload = payload
-
-        def json(self) -> dict[str, Any]:
-            return self._payload
-
-    def _http_get(
-        url: str,
-        headers: dict[str, str] | None = None,
-        params: dict[str, Any] | None = None,
-        timeout: int = 30,
-    ) -> _HTTPResponse:
-        if params:
-            query = urlencode(params)
-            url = f"{url}?{query}"
-        req = Request(url, headers=headers or {})
+_GRAPHQL_URL = "https://api.github.com/graphql"
+
+# ``requests`` pulls in urllib3/charset_normalizer/certifi, so it is only imported by
+# the handlers that talk to the GitHub API. False records that it is unavailable.
+_HTTP_CLIENT: Any = None
+
+
+def _get_http_client() -> Any:
+    """Return the ``requests`` module, or None to use the urllib fallback."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        try:
+            import requests  # type: ignore[import-untyped]
+        except ModuleNotFoundError:  # pragma: no cover - fallback when requests unavailable
+            _HTTP_CLIENT = False
+        else:
+            _HTTP_CLIENT = requests
+    return _HTTP_CLIENT or None
+
+
+class _HTTPResponse:
+    """Minimal response wrapper mirroring requests.Response."""
+
+    def __init__(self, status_code: int, payload: dict[str, Any], headers: Any = None) -> None:
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers if headers is not None else {}
+
+    def json(self) -> dict[str, Any]:
+        return self._payload
+
+
+def _urlopen_json(req: Any, timeout: int) -> _HTTPResponse:
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+
+    # Like requests, report non-2xx statuses (including 304) instead of raising.
+    try:
         with urlopen(req, timeout=timeout) as resp:
             status_code = resp.getcode()
+            headers = resp.headers
             body = resp.read().decode("utf-8")
-        try:
-            payload = json.loads(body or "{}")
-        except json.JSONDecodeError:
-            payload = {}
-        return _HTTPResponse(status_code, payload)
+    except HTTPError as exc:
+        return _HTTPResponse(exc.code, {}, exc.headers)
+    try:
+        payload = json.loads(body or "{}")
+    except json.JSONDecodeError:
+        payload = {}
+    return _HTTPResponse(status_code, payload, headers)
+
+
+def _http_get(
+    url: str,
+    headers: dict[str, str] | None = None,
+    params: dict[str, Any] | None = None,
+    timeout: int = 30,
+) -> Any:
+    client = _get_http_client()
+    if client is not None:  # pragma: no cover - exercised when requests is installed
+        return client.get(url, headers=headers, params=params, timeout=timeout)
 
-else:  # pragma: no cover - exercised in runtime environments with requests installed
+    from urllib.parse import urlencode
+    from urllib.request import Request
+
+    if params:
+        query = urlencode(params)
+        url = f"{url}?{query}"
+    return _urlopen_json(Request(url, headers=headers or {}), timeout)
+
+
+def _graphql_post(
+    query: str,
+    variables: dict[str, Any],
+    headers: dict[str, str] | None = None,
+    timeout: int = 30,
+) -> Any:
+    client = _get_http_client()
+    if client is not None:  # pragma: no cover - exercised when requests is installed
+        return client.post(
+            _GRAPHQL_URL,
+            headers=headers,
+            json={"query": query, "variables": variables},
+            timeout=timeout,
+        )
+
+    from urllib.request import Request
 
-    def _http_get(
-        url: str,
-        headers: dict[str, str] | None = None,
-        params: dict[str, Any] | None = None,
-        timeout: int = 30,
-    ):
-        return requests.get(url, headers=headers, params=params, timeout=timeout)
+    data = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+    req = Request(
+        _GRAPHQL_URL,
+        data=data,
+        headers={**(headers or {}), "Content-Type": "application/json"},
+        method="POST",
+    )
+    return _urlopen_json(req, timeout)
 
 
 _CONFIG_CACHE: dict[str, Any] | None = None
+_BUFFERS: dict[str, list[str]] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _env(name: str, default: str = "") -> str:
+    """Read an environment variable once per process; the CI step environment is static."""
+    return os.environ.get(name, default)
+
+
+@functools.lru_cache(maxsize=None)
+def _which(binary: str) -> str:
+    import shutil
+
+    return shutil.which(binary) or binary
 
 
 def append_to_file(path_env: str, content: str) -> None:
-    """Append content to the file referenced by a GitHub Actions environment variable."""
+    """Append content to the file referenced by a GitHub Actions environment variable.
+
+    Writes are buffered per file and flushed once after the handler returns.
+    """
     file_path = os.environ.get(path_env)
     if not file_path:
         return
+    _BUFFERS.setdefault(file_path, []).append(content)
+
+
+def _write_bytes(file_path: str, data: bytes) -> None:
     Path(file_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, "a", encoding="utf-8") as handle:
-        handle.write(content)
+    fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+def _append_bytes(path_env: str, data: bytes) -> None:
+    """Append pre-encoded content immediately, after any text still buffered for the file."""
+    file_path = os.environ.get(path_env)
+    if not file_path:
+        return
+    pending = _BUFFERS.pop(file_path, None)
+    if pending:
+        data = "".join(pending).encode("utf-8") + data
+    _write_bytes(file_path, data)
+
+
+def _flush_buffers() -> None:
+    """Write all buffered content, attempting every file before raising the first error."""
+    pending = list(_BUFFERS.items())
+    _BUFFERS.clear()
+    errors: list[OSError] = []
+    for file_path, chunks in pending:
+        try:
+            _write_bytes(file_path, "".join(chunks).encode("utf-8"))
+        except OSError as exc:
+            print(f"::error::Unable to write {file_path}: {exc}")
+            errors.append(exc)
+    if errors:
+        raise errors[0]
+
+
+# main() flushes explicitly so write failures reach the exit code; this only covers
+# callers that import the module and never reach that flush.
+atexit.register(_flush_buffers)
 
 
 def write_output(name: str, value: str) -> None:
@@ -106,47 +215,177 @@ def get_repository_config() -> dict[str, Any]:
     return _CONFIG_CACHE
 
 
-def _config_path(default: Any, *path: str) -> Any:
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=128)
+def _config_lookup(path: tuple[str, ...]) -> Any:
+    # The parsed config never changes within a process, so each key path is walked once.
     current: Any = get_repository_config()
     for key in path:
         if not isinstance(current, dict) or key not in current:
-            return default
+            return _MISSING
         current = current[key]
     return current
 
 
+def _config_path(default: Any, *path: str) -> Any:
+    value = _config_lookup(path)
+    return default if value is _MISSING else value
+
+
 def debug_filter(_: argparse.Namespace) -> None:
     mapping = {
-        "Go files changed": os.environ.get("CI_GO_FILES", ""),
-        "Frontend files changed": os.environ.get("CI_FRONTEND_FILES", ""),
-        "Python files changed": os.environ.get("CI_PYTHON_FILES", ""),
-        "Rust files changed": os.environ.get("CI_RUST_FILES", ""),
-        "Docker files changed": os.environ.get("CI_DOCKER_FILES", ""),
-        "Docs files changed": os.environ.get("CI_DOCS_FILES", ""),
-        "Workflow files changed": os.environ.get("CI_WORKFLOW_FILES", ""),
-        "Workflow YAML files changed": os.environ.get("CI_WORKFLOW_YAML_FILES", ""),
-        "Workflow scripts changed": os.environ.get("CI_WORKFLOW_SCRIPT_FILES", ""),
-        "Linter config files changed": os.environ.get("CI_LINT_FILES", ""),
+        "Go files changed": _env("CI_GO_FILES", ""),
+        "Frontend files changed": _env("CI_FRONTEND_FILES", ""),
+        "Python files changed": _env("CI_PYTHON_FILES", ""),
+        "Rust files changed": _env("CI_RUST_FILES", ""),
+        "Docker files changed": _env("CI_DOCKER_FILES", ""),
+        "Docs files changed": _env("CI_DOCS_FILES", ""),
+        "Workflow files changed": _env("CI_WORKFLOW_FILES", ""),
+        "Workflow YAML files changed": _env("CI_WORKFLOW_YAML_FILES", ""),
+        "Workflow scripts changed": _env("CI_WORKFLOW_SCRIPT_FILES", ""),
+        "Linter config files changed": _env("CI_LINT_FILES", ""),
     }
     for label, value in mapping.items():
         print(f"{label}: {value}")
 
 
+_SKIP_CI_RE = re.compile(r"\[(?:skip ci|ci skip)\]", re.IGNORECASE)
+
+
 def determine_execution(_: argparse.Namespace) -> None:
-    commit_message = os.environ.get("GITHUB_HEAD_COMMIT_MESSAGE", "")
-    skip_ci = bool(re.search(r"\[(skip ci|ci skip)\]", commit_message, flags=re.IGNORECASE))
-    write_output("skip_ci", "true" if skip_ci else "false")
+    commit_message = _env("GITHUB_HEAD_COMMIT_MESSAGE")
+    skip_ci = bool(_SKIP_CI_RE.search(commit_message))
     if skip_ci:
         print("Skipping CI due to commit message")
     else:
         print("CI will continue; no skip directive found in commit message")
 
-    write_output("should_lint", "true")
-    write_output("should_test_go", os.environ.get("CI_GO_FILES", "false"))
-    write_output("should_test_frontend", os.environ.get("CI_FRONTEND_FILES", "false"))
-    write_output("should_test_python", os.environ.get("CI_PYTHON_FILES", "false"))
-    write_output("should_test_rust", os.environ.get("CI_RUST_FILES", "false"))
-    write_output("should_test_docker", os.environ.get("CI_DOCKER_FILES", "false"))
+    outputs = {
+        "skip_ci": "true" if skip_ci else "false",
+        "should_lint": "true",
+        "should_test_go": _env("CI_GO_FILES", "false"),
+        "should_test_frontend": _env("CI_FRONTEND_FILES", "false"),
+        "should_test_python": _env("CI_PYTHON_FILES", "false"),
+        "should_test_rust": _env("CI_RUST_FILES", "false"),
+        "should_test_docker": _env("CI_DOCKER_FILES", "false"),
+    }
+    append_to_file("GITHUB_OUTPUT", "".join(f"{key}={value}\n" for key, value in outputs.items()))
+
+
+def _check_pr_automation(
+    headers: dict[str, str],
+    url: str,
+    target_sha: str,
+    workflow_name: str | None,
+    event: str | None = None,
+    state: dict[str, Any] | None = None,
+) -> str | None:
+    """Return the PR automation run status for ``target_sha``, or None if no run exists.
+
+    When ``state`` is given, the previous response's ETag and status are kept there
+    so repeated polls become conditional requests.
+    """
+    # head_sha/event are filtered server-side; the run name is not a query parameter,
+    # so it is matched here unless ``url`` is already scoped to a single workflow.
+    params: dict[str, Any] = {"head_sha": target_sha, "per_page": 20}
+    if event:
+        params["event"] = event
+    if state and state.get("etag"):
+        headers = {**headers, "If-None-Match": state["etag"]}
+    response = _http_get(url, headers=headers, params=params, timeout=30)
+    if response.status_code == 304 and state is not None:
+        # Unchanged since the last poll; 304s do not count against the rate limit.
+        return state.get("status")
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+
+    runs = response.json().get("workflow_runs", [])
+    matching_runs = [
+        run
+        for run in runs
+        if run.get("head_sha") == target_sha
+        and (workflow_name is None or run.get("name") == workflow_name)
+    ]
+    # As with the GraphQL lookup, several runs may exist for one commit; only report
+    # completion once all of them have finished.
+    status: str | None = None
+    if matching_runs:
+        pending = [
+            run.get("status", "") for run in matching_runs if run.get("status") != "completed"
+        ]
+        status = pending[0] if pending else "completed"
+    if state is not None:
+        state["etag"] = response.headers.get("ETag")
+        state["status"] = status
+    return status
+
+
+# App ID of GitHub Actions; other apps' check suites never carry a workflow run.
+_ACTIONS_APP_ID = 15368
+
+_PR_AUTOMATION_QUERY = """
+query($owner: String!, $repo: String!, $sha: GitObjectID!, $appId: Int!, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    object(oid: $sha) {
+      ... on Commit {
+        checkSuites(first: 100, after: $cursor, filterBy: {appId: $appId}) {
+          nodes {
+            status
+            workflowRun { workflow { name } }
+          }
+          pageInfo { hasNextPage endCursor }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def _query_pr_automation(
+    headers: dict[str, str], repo: str, target_sha: str, workflow_name: str
+) -> str | None:
+    """GraphQL variant of ``_check_pr_automation`` resolving the run via the commit.
+
+    The workflow may have run several times for the same commit, so it only counts
+    as completed once every matching check suite is.
+    """
+    owner, _, name = repo.partition("/")
+    variables: dict[str, Any] = {
+        "owner": owner,
+        "repo": name,
+        "sha": target_sha,
+        "appId": _ACTIONS_APP_ID,
+        "cursor": None,
+    }
+    statuses: list[str] = []
+    while True:
+        response = _graphql_post(_PR_AUTOMATION_QUERY, variables, headers=headers, timeout=30)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+        payload = response.json()
+        if payload.get("errors"):
+            raise RuntimeError(payload["errors"][0].get("message", "GraphQL error"))
+
+        commit = ((payload.get("data") or {}).get("repository") or {}).get("object") or {}
+        suites = commit.get("checkSuites") or {}
+        for suite in suites.get("nodes") or []:
+            workflow = ((suite.get("workflowRun") or {}).get("workflow") or {}).get("name")
+            if workflow == workflow_name:
+                statuses.append((suite.get("status") or "").lower())
+
+        page_info = suites.get("pageInfo") or {}
+        if not page_info.get("hasNextPage"):
+            break
+        variables["cursor"] = page_info.get("endCursor")
+
+    if not statuses:
+        return None
+    pending = [status for status in statuses if status != "completed"]
+    return pending[0] if pending else "completed"
 
 
 def wait_for_pr_automation(_: argparse.Namespace) -> None:
@@ -154,6 +393,9 @@ def wait_for_pr_automation(_: argparse.Namespace) -> None:
     token = os.environ.get("GITHUB_TOKEN")
     target_sha = os.environ.get("TARGET_SHA")
     workflow_name = os.environ.get("WORKFLOW_NAME", "PR Automation")
+    workflow_file = os.environ.get("WORKFLOW_FILE")
+    event_name = os.environ.get("GITHUB_EVENT_NAME", "")
+    run_event = os.environ.get("EVENT_NAME") or None
     max_attempts = int(os.environ.get("MAX_ATTEMPTS", "60"))
     sleep_seconds = int(os.environ.get("SLEEP_SECONDS", "10"))
 
@@ -165,54 +407,66 @@ def wait_for_pr_automation(_: argparse.Namespace) -> None:
         "Authorization": f"token {token}",
         "Accept": "application/vnd.github.v3+json",
     }
-    url = f"https://api.github.com/repos/{repo}/actions/runs"
+    # A known workflow file has an exact REST endpoint; otherwise resolve the run by
+    # name through the commit's check suites in a single GraphQL round-trip.
+    url = (
+        f"https://api.github.com/repos/{repo}/actions/workflows/{workflow_file}/runs"
+        if workflow_file
+        else None
+    )
+
+    # Workflows triggered by the PR automation completion event (workflow_run or
+    # repository_dispatch) only need a single confirming check.
+    if event_name in {"workflow_run", "repository_dispatch"}:
+        max_attempts = 1
+    # The completion events never match the PR automation run's own event.
+    if run_event in {"workflow_run", "repository_dispatch"}:
+        run_event = None
 
+    poll_state: dict[str, Any] = {}
     print("🔄 Waiting for PR automation to complete...")
     for attempt in range(max_attempts):
         print(f"Checking for PR automation completion (attempt {attempt + 1}/{max_attempts})...")
         try:
-            response = _http_get(url, headers=headers, params={"per_page": 100}, timeout=30)
+            if url:
+                status = _check_pr_automation(
+                    headers, url, target_sha, None, run_event, state=poll_state
+                )
+            else:
+                status = _query_pr_automation(headers, repo, target_sha, workflow_name)
         except Exception as exc:  # pragma: no cover - network issues during CI
             print(f"::warning::Unable to query workflow runs: {exc}")
-            time.sleep(sleep_seconds)
-            continue
-        if response.status_code != 200:
-            print(f"::warning::Unable to query workflow runs: {response.status_code}")
-            time.sleep(sleep_seconds)
+            if attempt + 1 < max_attempts:
+                time.sleep(sleep_seconds)
             continue
 
-        runs = response.json().get("workflow_runs", [])
-        matching_runs = [
-            run
-            for run in runs
-            if run.get("head_sha") == target_sha and run.get("name") == workflow_name
-        ]
-
-        if not matching_runs:
+        if status is None:
             print("ℹ️  No PR automation workflow found, proceeding with CI")
             return
 
-        status = matching_runs[0].get("status", "")
         if status == "completed":
             print("✅ PR automation has completed, proceeding with CI")
             return
 
         print(f"⏳ PR automation status: {status or 'unknown'}, waiting...")
-        time.sleep(sleep_seconds)
+        if attempt + 1 < max_attempts:
+            time.sleep(sleep_seconds)
 
     print("⚠️  Timeout waiting for PR automation, proceeding with CI anyway")
 
 
 def _export_env_from_file(file_path: Path) -> None:
-    with file_path.open(encoding="utf-8") as handle:
-        for line in handle:
-            if "=" not in line:
-                continue
-            key, value = line.split("=", 1)
-            key = key.strip()
-            if not key or key.startswith("#"):
-                continue
-            append_env(key, value.strip())
+    lines: list[str] = []
+    for line in file_path.read_text(encoding="utf-8").splitlines():
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        key = key.strip()
+        if not key or key.startswith("#"):
+            continue
+        lines.append(f"{key}={value.strip()}\n")
+    if lines:
+        append_to_file("GITHUB_ENV", "".join(lines))
 
 
 def load_super_linter_config(_: argparse.Namespace) -> None:
@@ -242,6 +496,8 @@ def load_super_linter_config(_: argparse.Namespace) -> None:
 
 
 def write_validation_summary(_: argparse.Namespace) -> None:
+    import textwrap
+
     event_name = os.environ.get("EVENT_NAME", "unknown")
     config_name = os.environ.get("SUMMARY_CONFIG", "super-linter-ci.env")
     append_summary(
@@ -283,6 +539,47 @@ def _parse_go_coverage(total_line: str) -> float:
     return float(percentage)
 
 
+_GO_COVER_TAIL_BYTES = 256
+
+
+def _find_go_total_line(output: str) -> str:
+    # ``go tool cover -func`` always reports the total last, so scan from the tail.
+    _, sep, tail = output.rpartition("\ntotal:")
+    if not sep:
+        if not output.startswith("total:"):
+            raise ValueError("Total coverage line not found in go tool output")
+        tail = output[len("total:") :]
+    return "total:" + tail.split("\n", 1)[0]
+
+
+def _run_go_coverage(coverage_file: str | Path, html_output: str | Path, threshold: float) -> None:
+    go_binary = _which("go")
+    subprocess.run(
+        [
+            go_binary,
+            "tool",
+            "cover",
+            f"-html={coverage_file}",
+            "-o",
+            str(html_output),
+        ],
+        check=True,
+    )
+    result = subprocess.run(
+        [go_binary, "tool", "cover", "-func", str(coverage_file)],
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+
+    # Only the short trailing total line is needed; decode just the tail.
+    tail = result.stdout[-_GO_COVER_TAIL_BYTES:].decode("utf-8", errors="replace")
+    coverage = _parse_go_coverage(_find_go_total_line(tail))
+    print(f"Coverage: {coverage}%")
+    if coverage < threshold:
+        raise SystemExit(f"Coverage {coverage}% is below threshold {threshold}%")
+    print(f"✅ Coverage {coverage}% meets threshold {threshold}%")
+
+
 def go_test(_: argparse.Namespace) -> None:
     if not _ensure_go_context():
         return
@@ -307,39 +604,7 @@ def go_test(_: argparse.Namespace) -> None:
         check=True,
     )
 
-    go_binary = shutil.which("go") or "go"
-    subprocess.run(
-        [
-            go_binary,
-            "tool",
-            "cover",
-            f"-html={coverage_file}",
-            "-o",
-            coverage_html,
-        ],
-        check=True,
-    )
-    result = subprocess.run(
-        [go_binary, "tool", "cover", "-func", coverage_file],
-        check=True,
-        capture_output=True,
-        text=True,
-    )
-
-    total_line = ""
-    for line in result.stdout.splitlines():
-        if line.startswith("total:"):
-            total_line = line
-            break
-
-    if not total_line:
-        raise ValueError("Total coverage line not found in go tool output")
-
-    coverage = _parse_go_coverage(total_line)
-    print(f"Coverage: {coverage}%")
-    if coverage < threshold:
-        raise SystemExit(f"Coverage {coverage}% is below threshold {threshold}%")
-    print(f"✅ Coverage {coverage}% meets threshold {threshold}%")
+    _run_go_coverage(coverage_file, coverage_html, threshold)
 
 
 def check_go_coverage(_: argparse.Namespace) -> None:
@@ -350,40 +615,7 @@ def check_go_coverage(_: argparse.Namespace) -> None:
     if not coverage_file.is_file():
         raise FileNotFoundError(f"{coverage_file} not found")
 
-    go_binary = shutil.which("go") or "go"
-
-    subprocess.run(
-        [
-            go_binary,
-            "tool",
-            "cover",
-            f"-html={coverage_file}",
-            "-o",
-            str(html_output),
-        ],
-        check=True,
-    )
-    result = subprocess.run(
-        [go_binary, "tool", "cover", "-func", str(coverage_file)],
-        check=True,
-        capture_output=True,
-        text=True,
-    )
-
-    total_line = ""
-    for line in result.stdout.splitlines():
-        if line.startswith("total:"):
-            total_line = line
-            break
-
-    if not total_line:
-        raise ValueError("Total coverage line not found in go tool output")
-
-    coverage = _parse_go_coverage(total_line)
-    print(f"Coverage: {coverage}%")
-    if coverage < threshold:
-        raise SystemExit(f"Coverage {coverage}% is below threshold {threshold}%")
-    print(f"✅ Coverage {coverage}% meets threshold {threshold}%")
+    _run_go_coverage(coverage_file, html_output, threshold)
 
 
 def _run_command(command: Iterable[str], check: bool = True) -> subprocess.CompletedProcess[str]:
@@ -443,8 +675,43 @@ def frontend_run(_: argparse.Namespace) -> None:
         os.chdir(original_dir)
 
 
+def _python_install_marker() -> Path | None:
+    try:
+        return Path.home() / ".cache" / "ci_workflow" / "py_install.sha"
+    except RuntimeError:  # no resolvable home directory; always install
+        return None
+
+
+def _python_install_digest() -> str:
+    import hashlib
+
+    # Key on interpreter and project directory so a shared runner cache never
+    # skips installing a different project into a different environment.
+    digest = hashlib.sha256(f"{sys.executable}\n{sys.version}\n{Path.cwd()}\n".encode())
+    for name in ("requirements.txt", "pyproject.toml"):
+        path = Path(name)
+        if path.is_file():
+            digest.update(name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
 def python_install(_: argparse.Namespace) -> None:
     python = sys.executable
+    digest = _python_install_digest()
+    marker = _python_install_marker()
+    cached = ""
+    if marker is not None:
+        try:
+            cached = marker.read_text(encoding="utf-8").strip()
+        except OSError:  # missing or unreadable marker is a cache miss
+            cached = ""
+    if cached == digest:
+        probe = subprocess.run([python, "-c", "import pytest, pytest_cov"], check=False)
+        if probe.returncode == 0:
+            print("ℹ️ Python dependencies unchanged since last install; skipping pip")
+            return
+
     subprocess.run([python, "-m", "pip", "install", "--upgrade", "pip"], check=True)
 
     if Path("requirements.txt").is_file():
@@ -458,10 +725,46 @@ def python_install(_: argparse.Namespace) -> None:
 
     subprocess.run([python, "-m", "pip", "install", "pytest", "pytest-cov"], check=True)
 
+    if marker is not None:
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.write_text(f"{digest}\n", encoding="utf-8")
+        except OSError as exc:
+            print(f"::warning::Unable to record Python install marker {marker}: {exc}")
+
+
+_PYTHON_EXCLUDED_DIRS = frozenset({".venv", "site-packages", "node_modules", ".git"})
+
+
+def _iter_py_files(
+    root: str = ".", excluded: frozenset[str] = _PYTHON_EXCLUDED_DIRS
+) -> Iterator[os.DirEntry[str]]:
+    """Yield ``*.py`` entries under ``root``, pruning excluded directories before descent."""
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in excluded:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(".py") and entry.is_file():
+                        yield entry
+        except OSError:
+            continue
+
+
+def _has_python_sources(excluded: frozenset[str] = _PYTHON_EXCLUDED_DIRS) -> bool:
+    return any(True for _ in _iter_py_files(excluded=excluded))
+
 
 def python_run_tests(_: argparse.Namespace) -> None:
     def has_tests() -> bool:
-        return any(any(Path(".").rglob(pattern)) for pattern in ("test_*.py", "*_test.py"))
+        for entry in _iter_py_files():
+            name = entry.name
+            if name.startswith("test_") or name.endswith("_test.py"):
+                return True
+        return False
 
     if not has_tests():
         print("ℹ️ No Python tests found")
@@ -483,12 +786,9 @@ def python_run_tests(_: argparse.Namespace) -> None:
 
 def python_lint(_: argparse.Namespace) -> None:
     """Run Python formatting and linting if sources are present."""
-    python_sources = [
-        path
-        for path in Path(".").rglob("*.py")
-        if ".venv" not in path.parts and "site-packages" not in path.parts
-    ]
-    if not python_sources:
+    import shutil
+
+    if not _has_python_sources():
         print("ℹ️ No Python sources detected for linting.")
         return
 
@@ -555,6 +855,8 @@ def rust_clippy(_: argparse.Namespace) -> None:
 
 
 def ensure_cargo_llvm_cov(_: argparse.Namespace) -> None:
+    import shutil
+
     if shutil.which("cargo-llvm-cov"):
         print("cargo-llvm-cov already installed")
         return
@@ -594,6 +896,10 @@ def generate_rust_html(_: argparse.Namespace) -> None:
     )
 
 
+_LCOV_RE = re.compile(rb"^(L[FH]):(\d+)", re.MULTILINE)
+_LCOV_MMAP_THRESHOLD = 10 * 1024 * 1024
+
+
 def compute_rust_coverage(_: argparse.Namespace) -> None:
     path = Path(os.environ.get("LCOV_FILE", "lcov.info"))
     if not path.is_file():
@@ -601,11 +907,25 @@ def compute_rust_coverage(_: argparse.Namespace) -> None:
 
     total = 0
     covered = 0
-    for line in path.read_text(encoding="utf-8").splitlines():
-        if line.startswith("LF:"):
-            total += int(line.split(":", 1)[1])
-        elif line.startswith("LH:"):
-            covered += int(line.split(":", 1)[1])
+    if path.stat().st_size >= _LCOV_MMAP_THRESHOLD:
+        # Large reports: let the regex engine scan the mapped file instead of
+        # dispatching on every line in Python.
+        with path.open("rb") as handle, mmap.mmap(
+            handle.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            for match in _LCOV_RE.finditer(mapped):
+                if match.group(1) == b"LF":
+                    total += int(match.group(2))
+                else:
+                    covered += int(match.group(2))
+    else:
+        with path.open(encoding="utf-8", buffering=1 << 20) as handle:
+            for line in handle:
+                prefix = line[:3]
+                if prefix == "LF:":
+                    total += int(line[3:])
+                elif prefix == "LH:":
+                    covered += int(line[3:])
 
     if total == 0:
         write_output("percent", "0")
@@ -656,15 +976,47 @@ def docs_validate_structure(_: argparse.Namespace) -> None:
     print("ℹ️ Documentation structure validation would go here")
 
 
-def run_benchmarks(_: argparse.Namespace) -> None:
-    has_benchmarks = False
+_GO_BENCHMARK_RE = re.compile(r"^func Benchmark", re.MULTILINE)
+
+
+def _has_go_benchmarks() -> bool:
+    # --untracked covers files generated by earlier steps (e.g. go generate), matching
+    # the working-tree fallback below while still honoring .gitignore.
+    try:
+        result = subprocess.run(
+            [
+                "git",
+                "grep",
+                "--untracked",
+                "-l",
+                "-E",
+                _GO_BENCHMARK_RE.pattern,
+                "--",
+                "*_test.go",
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except FileNotFoundError:
+        result = None
+
+    # git grep exits 0 on a match and 1 on none; anything else (e.g. not a
+    # work tree) falls back to scanning the files directly.
+    if result is not None and result.returncode in {0, 1}:
+        return bool(result.stdout.strip())
+
     for path in Path(".").rglob("*_test.go"):
         try:
-            if "Benchmark" in path.read_text(encoding="utf-8"):
-                has_benchmarks = True
-                break
+            if _GO_BENCHMARK_RE.search(path.read_text(encoding="utf-8")):
+                return True
         except UnicodeDecodeError:
             continue
+    return False
+
+
+def run_benchmarks(_: argparse.Namespace) -> None:
+    has_benchmarks = _has_go_benchmarks()
 
     if not has_benchmarks:
         print("ℹ️ No benchmarks found")
@@ -674,17 +1026,12 @@ def run_benchmarks(_: argparse.Namespace) -> None:
 
 
 def _matrix_entries(versions: list[str], oses: list[str], version_key: str) -> list[dict[str, Any]]:
-    matrix: list[dict[str, Any]] = []
-    for os_index, runner in enumerate(oses):
-        for ver_index, version in enumerate(versions):
-            matrix.append(
-                {
-                    "os": runner,
-                    version_key: version,
-                    "primary": os_index == 0 and ver_index == 0,
-                }
-            )
-    return matrix
+    return [
+        {"os": runner, version_key: version, "primary": os_index == 0 and ver_index == 0}
+        for (os_index, runner), (ver_index, version) in product(
+            enumerate(oses), enumerate(versions)
+        )
+    ]
 
 
 def generate_matrices(_: argparse.Namespace) -> None:
@@ -708,59 +1055,53 @@ def generate_matrices(_: argparse.Namespace) -> None:
     rust_matrix = _matrix_entries(rust_versions, os_list, "rust-version")
     frontend_matrix = _matrix_entries(node_versions, os_list, "node-version")
 
-    write_output("go-matrix", json.dumps({"include": go_matrix}, separators=(",", ":")))
-    write_output(
-        "python-matrix",
-        json.dumps({"include": python_matrix}, separators=(",", ":")),
-    )
-    write_output(
-        "rust-matrix",
-        json.dumps({"include": rust_matrix}, separators=(",", ":")),
-    )
-    write_output(
-        "frontend-matrix",
-        json.dumps({"include": frontend_matrix}, separators=(",", ":")),
-    )
-
     coverage_threshold = _config_path(fallback_threshold, "testing", "coverage", "threshold")
-    write_output("coverage-threshold", str(coverage_threshold))
+
+    outputs = {
+        "go-matrix": json.dumps({"include": go_matrix}, separators=(",", ":")),
+        "python-matrix": json.dumps({"include": python_matrix}, separators=(",", ":")),
+        "rust-matrix": json.dumps({"include": rust_matrix}, separators=(",", ":")),
+        "frontend-matrix": json.dumps({"include": frontend_matrix}, separators=(",", ":")),
+        "coverage-threshold": str(coverage_threshold),
+    }
+    append_to_file("GITHUB_OUTPUT", "".join(f"{key}={value}\n" for key, value in outputs.items()))
 
 
 def generate_ci_summary(_: argparse.Namespace) -> None:
-    primary_language = os.environ.get("PRIMARY_LANGUAGE", "unknown")
+    primary_language = _env("PRIMARY_LANGUAGE", "unknown")
     steps = [
-        ("Detect Changes", os.environ.get("JOB_DETECT_CHANGES", "skipped")),
-        ("Workflow YAML", os.environ.get("JOB_WORKFLOW_LINT", "skipped")),
-        ("Workflow Scripts", os.environ.get("JOB_WORKFLOW_SCRIPTS", "skipped")),
-        ("Go CI", os.environ.get("JOB_GO", "skipped")),
-        ("Python CI", os.environ.get("JOB_PYTHON", "skipped")),
-        ("Rust CI", os.environ.get("JOB_RUST", "skipped")),
-        ("Frontend CI", os.environ.get("JOB_FRONTEND", "skipped")),
-        ("Docker CI", os.environ.get("JOB_DOCKER", "skipped")),
-        ("Docs CI", os.environ.get("JOB_DOCS", "skipped")),
+        ("Detect Changes", _env("JOB_DETECT_CHANGES", "skipped")),
+        ("Workflow YAML", _env("JOB_WORKFLOW_LINT", "skipped")),
+        ("Workflow Scripts", _env("JOB_WORKFLOW_SCRIPTS", "skipped")),
+        ("Go CI", _env("JOB_GO", "skipped")),
+        ("Python CI", _env("JOB_PYTHON", "skipped")),
+        ("Rust CI", _env("JOB_RUST", "skipped")),
+        ("Frontend CI", _env("JOB_FRONTEND", "skipped")),
+        ("Docker CI", _env("JOB_DOCKER", "skipped")),
+        ("Docs CI", _env("JOB_DOCS", "skipped")),
     ]
 
     files_changed = {
-        "Go": os.environ.get("CI_GO_FILES", "false"),
-        "Frontend": os.environ.get("CI_FRONTEND_FILES", "false"),
-        "Python": os.environ.get("CI_PYTHON_FILES", "false"),
-        "Rust": os.environ.get("CI_RUST_FILES", "false"),
-        "Docker": os.environ.get("CI_DOCKER_FILES", "false"),
-        "Docs": os.environ.get("CI_DOCS_FILES", "false"),
-        "Workflow YAML": os.environ.get(
+        "Go": _env("CI_GO_FILES", "false"),
+        "Frontend": _env("CI_FRONTEND_FILES", "false"),
+        "Python": _env("CI_PYTHON_FILES", "false"),
+        "Rust": _env("CI_RUST_FILES", "false"),
+        "Docker": _env("CI_DOCKER_FILES", "false"),
+        "Docs": _env("CI_DOCS_FILES", "false"),
+        "Workflow YAML": _env(
             "CI_WORKFLOW_YAML_FILES",
-            os.environ.get("CI_WORKFLOW_FILES", "false"),
+            _env("CI_WORKFLOW_FILES", "false"),
         ),
-        "Workflow Scripts": os.environ.get("CI_WORKFLOW_SCRIPT_FILES", "false"),
-        "Lint Config": os.environ.get("CI_LINT_FILES", "false"),
+        "Workflow Scripts": _env("CI_WORKFLOW_SCRIPT_FILES", "false"),
+        "Lint Config": _env("CI_LINT_FILES", "false"),
     }
 
     languages = {
-        "has-rust": os.environ.get("HAS_RUST", "false"),
-        "has-go": os.environ.get("HAS_GO", "false"),
-        "has-python": os.environ.get("HAS_PYTHON", "false"),
-        "has-frontend": os.environ.get("HAS_FRONTEND", "false"),
-        "has-docker": os.environ.get("HAS_DOCKER", "false"),
+        "has-rust": _env("HAS_RUST", "false"),
+        "has-go": _env("HAS_GO", "false"),
+        "has-python": _env("HAS_PYTHON", "false"),
+        "has-frontend": _env("HAS_FRONTEND", "false"),
+        "has-docker": _env("HAS_DOCKER", "false"),
     }
 
     summary_lines = [
@@ -788,19 +1129,19 @@ def generate_ci_summary(_: argparse.Namespace) -> None:
     summary_lines.extend(f"- {label}: {value}" for label, value in files_changed.items())
     summary_lines.append("")
 
-    append_summary("\n".join(summary_lines) + "\n")
+    _append_bytes("GITHUB_STEP_SUMMARY", ("\n".join(summary_lines) + "\n").encode("utf-8"))
 
 
 def check_ci_status(_: argparse.Namespace) -> None:
     job_envs = {
-        "Workflow Lint": os.environ.get("JOB_WORKFLOW_LINT"),
-        "Workflow Scripts": os.environ.get("JOB_WORKFLOW_SCRIPTS"),
-        "Go CI": os.environ.get("JOB_GO"),
-        "Frontend CI": os.environ.get("JOB_FRONTEND"),
-        "Python CI": os.environ.get("JOB_PYTHON"),
-        "Rust CI": os.environ.get("JOB_RUST"),
-        "Docker CI": os.environ.get("JOB_DOCKER"),
-        "Docs CI": os.environ.get("JOB_DOCS"),
+        "Workflow Lint": _env("JOB_WORKFLOW_LINT"),
+        "Workflow Scripts": _env("JOB_WORKFLOW_SCRIPTS"),
+        "Go CI": _env("JOB_GO"),
+        "Frontend CI": _env("JOB_FRONTEND"),
+        "Python CI": _env("JOB_PYTHON"),
+        "Rust CI": _env("JOB_RUST"),
+        "Docker CI": _env("JOB_DOCKER"),
+        "Docs CI": _env("JOB_DOCS"),
     }
 
     failures = [job for job, status in job_envs.items() if status in {"failure", "cancelled"}]
@@ -810,54 +1151,66 @@ def check_ci_status(_: argparse.Namespace) -> None:
     print("✅ CI Pipeline succeeded")
 
 
+_COMMANDS = {
+    "debug-filter": debug_filter,
+    "determine-execution": determine_execution,
+    "wait-for-pr-automation": wait_for_pr_automation,
+    "load-super-linter-config": load_super_linter_config,
+    "write-validation-summary": write_validation_summary,
+    "generate-matrices": generate_matrices,
+    "go-setup": go_setup,
+    "go-test": go_test,
+    "check-go-coverage": check_go_coverage,
+    "frontend-install": frontend_install,
+    "frontend-run": frontend_run,
+    "python-install": python_install,
+    "python-lint": python_lint,
+    "python-run-tests": python_run_tests,
+    "ensure-cargo-llvm-cov": ensure_cargo_llvm_cov,
+    "rust-format": rust_format,
+    "rust-clippy": rust_clippy,
+    "generate-rust-lcov": generate_rust_lcov,
+    "generate-rust-html": generate_rust_html,
+    "compute-rust-coverage": compute_rust_coverage,
+    "enforce-coverage-threshold": enforce_coverage_threshold,
+    "docker-build": docker_build,
+    "docker-test-compose": docker_test_compose,
+    "docs-check-links": docs_check_links,
+    "docs-validate-structure": docs_validate_structure,
+    "run-benchmarks": run_benchmarks,
+    "generate-ci-summary": generate_ci_summary,
+    "check-ci-status": check_ci_status,
+}
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="CI workflow helper commands.")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
-    commands = {
-        "debug-filter": debug_filter,
-        "determine-execution": determine_execution,
-        "wait-for-pr-automation": wait_for_pr_automation,
-        "load-super-linter-config": load_super_linter_config,
-        "write-validation-summary": write_validation_summary,
-        "generate-matrices": generate_matrices,
-        "go-setup": go_setup,
-        "go-test": go_test,
-        "check-go-coverage": check_go_coverage,
-        "frontend-install": frontend_install,
-        "frontend-run": frontend_run,
-        "python-install": python_install,
-        "python-lint": python_lint,
-        "python-run-tests": python_run_tests,
-        "ensure-cargo-llvm-cov": ensure_cargo_llvm_cov,
-        "rust-format": rust_format,
-        "rust-clippy": rust_clippy,
-        "generate-rust-lcov": generate_rust_lcov,
-        "generate-rust-html": generate_rust_html,
-        "compute-rust-coverage": compute_rust_coverage,
-        "enforce-coverage-threshold": enforce_coverage_threshold,
-        "docker-build": docker_build,
-        "docker-test-compose": docker_test_compose,
-        "docs-check-links": docs_check_links,
-        "docs-validate-structure": docs_validate_structure,
-        "run-benchmarks": run_benchmarks,
-        "generate-ci-summary": generate_ci_summary,
-        "check-ci-status": check_ci_status,
-    }
-
-    for command, handler in commands.items():
+    for command, handler in _COMMANDS.items():
         subparsers.add_parser(command).set_defaults(handler=handler)
     return parser
 
 
 def main() -> None:
-    parser = build_parser()
-    args = parser.parse_args()
-    handler = getattr(args, "handler", None)
-    if handler is None:
-        parser.print_help()
-        raise SystemExit(1)
-    handler(args)
+    argv = sys.argv[1:]
+    # Every subcommand takes no arguments, so a bare command name can be dispatched
+    # without building the full parser; help and errors still go through argparse.
+    if len(argv) == 1 and argv[0] in _COMMANDS:
+        handler = _COMMANDS[argv[0]]
+        args = argparse.Namespace(command=argv[0], handler=handler)
+    else:
+        parser = build_parser()
+        args = parser.parse_args(argv)
+        handler = getattr(args, "handler", None)
+        if handler is None:
+            parser.print_help()
+            raise SystemExit(1)
+
+    try:
+        handler(args)
+    finally:
+        _flush_buffers()
 
 
 if __name__ == "__main__":